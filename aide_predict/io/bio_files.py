@@ -8,5 +8,31 @@
 Importing EVcouplings alignment IO into the namespace. All credit goes to the EVcouples team:
 
 Hopf T. A., Green A. G., Schubert B., et al. The EVcouplings Python framework for coevolutionary sequence analysis. Bioinformatics 35, 1582–1584 (2019)
+
+Also provides write_fasta_bytes, a buffered writer used for large FASTA exports.
 '''
-from evcouplings.align.alignment import *
\ No newline at end of file
+from evcouplings.align.alignment import *
+from typing import Any, Iterable, Tuple
+
+# FASTA output is wrapped at this many residues per line and written through a buffer of this size
+_FASTA_LINE_WIDTH = 80
+_FASTA_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def write_fasta_bytes(records: Iterable[Tuple[Any, str]], output_path: str) -> None:
+    """
+    Write (id, sequence) records to a FASTA file.
+
+    Unlike write_fasta, which writes line by line to an open text handle, each record is assembled into
+    a single bytes payload and the file is opened in binary mode with a large buffer, so that writes
+    reach the OS in chunks of about 1 MB.
+
+    Args:
+        records (Iterable[Tuple[Any, str]]): The ids and sequences to write.
+        output_path (str): The path to the output FASTA file.
+    """
+    with open(output_path, 'wb', buffering=_FASTA_WRITE_BUFFER_SIZE) as f:
+        for seq_id, seq in records:
+            encoded = str(seq).encode('ascii')
+            lines = [encoded[i:i + _FASTA_LINE_WIDTH] for i in range(0, len(encoded), _FASTA_LINE_WIDTH)] or [b'']
+            f.write(b'>' + str(seq_id).encode() + b'\n' + b'\n'.join(lines) + b'\n')
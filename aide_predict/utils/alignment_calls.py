@@ -12,17 +12,38 @@ Hopf T. A., Green A. G., Schubert B., et al. The EVcouplings Python framework fo
 import tempfile
 import subprocess
 import os
+from functools import lru_cache
 
 from evcouplings.align.tools import *
 
-from Bio import pairwise2
-from Bio.Align import substitution_matrices
+from Bio.Align import PairwiseAligner, substitution_matrices
 
 from typing import Union, Optional
 
 import logging
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def _get_global_aligner(matrix: str, gap_open: float, gap_extend: float) -> PairwiseAligner:
+    """
+    Build a global PairwiseAligner, cached so that the substitution matrix is only loaded once per setting.
+
+    Args:
+        matrix (str): The substitution matrix to use.
+        gap_open (float): The gap opening penalty.
+        gap_extend (float): The gap extension penalty.
+
+    Returns:
+        PairwiseAligner: The configured aligner.
+    """
+    aligner = PairwiseAligner()
+    aligner.mode = 'global'
+    aligner.substitution_matrix = substitution_matrices.load(matrix)
+    aligner.open_gap_score = gap_open
+    aligner.extend_gap_score = gap_extend
+    return aligner
+
+
 def sw_global_pairwise(seq1: "ProteinSequence", seq2: "ProteinSequence", matrix: str = 'BLOSUM62', gap_open: float = -10, gap_extend: float = -0.5) -> tuple['ProteinSequence', 'ProteinSequence']:
     """
     Align two ProteinSequence objects using global alignment with a specified substitution matrix.
@@ -40,19 +61,16 @@ def sw_global_pairwise(seq1: "ProteinSequence", seq2: "ProteinSequence", matrix:
     if seq1.has_gaps or seq2.has_gaps:
         raise ValueError("Input sequences should not contain gaps to be aligned")
 
-    # Load the substitution matrix
-    subst_matrix = substitution_matrices.load(matrix)
-
-    # Perform the global alignment
-    alignments = pairwise2.align.globalds(str(seq1), str(seq2), subst_matrix, gap_open, gap_extend)
+    # Perform the global alignment with the C implementation in Biopython
+    aligner = _get_global_aligner(matrix, gap_open, gap_extend)
 
     # Get the best alignment (first in the list)
-    best_alignment = alignments[0]
+    best_alignment = aligner.align(str(seq1), str(seq2))[0]
 
     # Create new ProteinSequence objects with the aligned sequences
     from aide_predict.utils.data_structures import ProteinSequence
-    aligned_seq1 = ProteinSequence(best_alignment.seqA, id=seq1.id, structure=seq1.structure)
-    aligned_seq2 = ProteinSequence(best_alignment.seqB, id=seq2.id, structure=seq2.structure)
+    aligned_seq1 = ProteinSequence(best_alignment[0], id=seq1.id, structure=seq1.structure)
+    aligned_seq2 = ProteinSequence(best_alignment[1], id=seq2.id, structure=seq2.structure)
 
     return aligned_seq1, aligned_seq2
 
@@ -60,7 +78,8 @@ def sw_global_pairwise(seq1: "ProteinSequence", seq2: "ProteinSequence", matrix:
 def mafft_align(sequences: "ProteinSequences",
                 existing_alignment: Optional["ProteinSequences"] = None,
                 realign: bool = False,
-                output_fasta: Optional[str] = None) -> "ProteinSequences":
+                output_fasta: Optional[str] = None,
+                threads: int = 1) -> "ProteinSequences":
     """
     Perform multiple sequence alignment using MAFFT.
 
@@ -69,14 +88,19 @@ def mafft_align(sequences: "ProteinSequences",
         existing_alignment (Optional[ProteinSequences]): An existing alignment to add sequences to.
         realign (bool): If True, realign all sequences from scratch. If False, add new sequences to existing alignment.
         output_fasta (Optional[str]): Path to save the alignment. If None, a temporary file is used.
+        threads (int): Number of threads for MAFFT to use. -1 lets MAFFT choose based on the available cores.
 
     Returns:
         ProteinSequences: The aligned sequences, either in memory or on file depending on output_fasta.
 
     Raises:
+        ValueError: If threads is not -1 or a positive integer.
         subprocess.CalledProcessError: If MAFFT execution fails.
         FileNotFoundError: If MAFFT is not installed or not in PATH.
     """
+    if threads != -1 and threads < 1:
+        raise ValueError(f"threads must be -1 or a positive integer, got {threads}")
+
     # Create a temporary directory for input and output files
     from aide_predict.utils.data_structures import ProteinSequences, ProteinSequencesOnFile
 
@@ -100,6 +124,8 @@ def mafft_align(sequences: "ProteinSequences",
 
         # Prepare MAFFT command
         mafft_cmd = ["mafft"]
+        if threads != 1:
+            mafft_cmd.extend(["--thread", str(threads)])
 
 
         # prepare existing alignment
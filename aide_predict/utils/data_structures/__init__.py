@@ -5,5 +5,5 @@
 * Company: National Renewable Energy Lab, Bioeneergy Science and Technology
 * License: MIT
 '''
-from .sequences import ProteinCharacter, ProteinSequence, ProteinSequences, ProteinSequencesOnFile
+from .sequences import ProteinCharacter, ProteinSequence, ProteinSequences, ProteinSequencesOnFile, ProteinSequencesMatrix
 from .structures import ProteinStructure, StructureMapper
\ No newline at end of file
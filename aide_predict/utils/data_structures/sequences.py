@@ -8,11 +8,16 @@
 Base data structures for the AIDE Predict package Where they do not exist in sklearn.
 '''
 from collections import UserList
+from functools import wraps
+import hashlib
+import json
+import mmap
 import os
+import tempfile
 import warnings
 import numpy as np
 
-from aide_predict.io.bio_files import read_fasta, write_fasta
+from aide_predict.io.bio_files import read_fasta, write_fasta_bytes
 from aide_predict.utils.alignment_calls import sw_global_pairwise, mafft_align
 
 from typing import List, Optional, Union, Iterator, Dict, Iterable, Any
@@ -21,6 +26,30 @@ from ..constants import AA_SINGLE, GAP_CHARACTERS, NON_CONONICAL_AA_SINGLE
 from .structures import ProteinStructure
 
 
+def _build_lut(characters: Iterable[str]) -> np.ndarray:
+    """Build a 256 entry boolean lookup table over byte values for the given characters."""
+    lut = np.zeros(256, dtype=bool)
+    lut[[ord(c) for c in characters]] = True
+    return lut
+
+# every character allowed in a sequence, lowercase letters mark non focus residues
+_VALID_CHARACTERS = frozenset(
+    AA_SINGLE | GAP_CHARACTERS | NON_CONONICAL_AA_SINGLE
+    | {c.lower() for c in AA_SINGLE | NON_CONONICAL_AA_SINGLE}
+)
+_VALID_LUT = _build_lut(_VALID_CHARACTERS)
+_GAP_LUT = _build_lut(GAP_CHARACTERS)
+_GAP_DELETE_TABLE = str.maketrans('', '', ''.join(GAP_CHARACTERS))
+_GAP_BYTES = ''.join(GAP_CHARACTERS).encode('ascii')
+_FASTA_WHITESPACE = b' \t\r\n'
+
+# bijection between valid characters and dense uint8 codes, used by ProteinSequencesMatrix
+_CODE_TO_AA = np.flatnonzero(_VALID_LUT).astype(np.uint8)
+_AA_TO_CODE = np.zeros(256, dtype=np.uint8)
+_AA_TO_CODE[_CODE_TO_AA] = np.arange(len(_CODE_TO_AA), dtype=np.uint8)
+_GAP_CODE_LUT = _GAP_LUT[_CODE_TO_AA]
+
+
 ############################################
 # A class to store a single protein character and sequence
 # They are treated like strings, eg you can do all that you expect from an AA string
@@ -48,7 +77,7 @@ class ProteinCharacter(str):
         obj =  str.__new__(cls, seq)
         if len(obj) != 1:
             raise ValueError("ProteinCharacter must be initialized with a single character")
-        if obj.upper() not in AA_SINGLE.union(GAP_CHARACTERS).union(NON_CONONICAL_AA_SINGLE):
+        if obj not in _VALID_CHARACTERS:
             raise ValueError(f"Invalid character {obj} for protein sequence.")
         return obj
 
@@ -96,7 +125,12 @@ class ProteinSequence(str):
             ProteinSequence: The new ProteinSequence object.
         """
         obj = str.__new__(cls, seq)
-        obj._characters: List[ProteinCharacter] = [ProteinCharacter(c) for c in seq]
+        # validate all characters in one pass over the bytes, non ascii characters become '?' and are caught here
+        byte_arr = np.frombuffer(obj.encode('ascii', errors='replace'), dtype=np.uint8)
+        valid = _VALID_LUT[byte_arr]
+        if not valid.all():
+            position = int(np.argmin(valid))
+            raise ValueError(f"Invalid character {obj[position]} at position {position} for protein sequence.")
         obj._id: Optional[str] = None
         obj._structure: Optional[Union[str, "ProteinStructure"]] = None
 
@@ -119,11 +153,18 @@ class ProteinSequence(str):
     
     def __hash__(self) -> int:
         """Compute a hash value for the ProteinSequence."""
-        return hash((tuple(self._characters), self._id, self._structure))
+        # str.__hash__ is cached by CPython on the string object, so this is cheap after the first call
+        return hash((str.__hash__(self), self._id, self._structure))
     
     def __eq__(self, other: object) -> bool:
         """Check if two ProteinSequence objects are equal."""
-        return hash(self) == hash(other)
+        if not isinstance(other, ProteinSequence):
+            return False
+        # cheap metadata checks first, the sequence comparison is O(n)
+        # ProteinStructure defines a value hash but no __eq__, so compare structures by hash
+        return (self._id == other._id
+                and hash(self._structure) == hash(other._structure)
+                and str.__eq__(self, other))
     
     def __ne__(self, other: object) -> bool:
         """Check if two ProteinSequence objects are not equal."""
@@ -136,27 +177,26 @@ class ProteinSequence(str):
     @property
     def has_gaps(self) -> bool:
         """Check if the sequence contains any gaps."""
-        return any(c.is_gap for c in self._characters)
+        return any(g in self for g in GAP_CHARACTERS)
     
     @property
     def has_non_canonical(self) -> bool:
         """Check if the sequence contains any non-canonical amino acids."""
-        return any(c.is_non_canonical for c in self._characters)
+        return any(c in self for c in NON_CONONICAL_AA_SINGLE)
 
     def with_no_gaps(self) -> 'ProteinSequence':
         """Return a new ProteinSequence with all gaps removed."""
-        return ProteinSequence("".join(c for c in self if c not in GAP_CHARACTERS),
-                               id=self._id, structure=self._structure)
+        return ProteinSequence(str.translate(self, _GAP_DELETE_TABLE), id=self._id, structure=self._structure)
     
     @property
     def as_array(self) -> np.ndarray:
         """Convert the sequence to a numpy array of characters."""
-        return np.array([c for c in self._characters]).reshape(1,-1)
+        return np.frombuffer(self.encode('ascii'), dtype=np.uint8).view('S1').astype('U1').reshape(1,-1)
 
     @property
     def num_gaps(self) -> int:
         """Get the number of gaps in the sequence."""
-        return sum(c.is_gap for c in self._characters)
+        return sum(str.count(self, g) for g in GAP_CHARACTERS)
     
     @property
     def base_length(self) -> int:
@@ -218,7 +258,7 @@ class ProteinSequence(str):
         """
         if position < 0 or position >= len(self):
             raise IndexError("Position out of range")
-        return self._characters[position]
+        return ProteinCharacter(self[position])
 
     def slice_as_protein_sequence(self, start: int, end: int) -> 'ProteinSequence':
         """
@@ -240,7 +280,7 @@ class ProteinSequence(str):
         Returns:
             Iterator[ProteinCharacter]: An iterator over the ProteinCharacters.
         """
-        return iter(self._characters)
+        return (ProteinCharacter(c) for c in self)
 
     @property
     def id(self) -> Optional[str]:
@@ -317,6 +357,15 @@ class ProteinSequence(str):
 # fixed length, etc.
 ############################################
 
+def _invalidates_cache(method):
+    """Wrap a list mutator so that it clears the derived property cache of ProteinSequences."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._cache = {}
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ProteinSequences(UserList):
     """
     A collection of ProteinSequence objects with additional functionality.
@@ -342,11 +391,15 @@ class ProteinSequences(UserList):
             sequences (List[ProteinSequence]): A list of ProteinSequence objects.
             weights (Optional[np.ndarray]): Weights for each sequence. If None, initialized as ones.
         """
+        # iterate the input rather than letting UserList copy its .data, which subclasses backed by
+        # a file or a code matrix leave empty
+        sequences = list(sequences)
         for s in sequences:
             if not isinstance(s, ProteinSequence):
                 raise ValueError("All elements must be ProteinSequence objects")
         super().__init__(sequences)
         self._id_to_pos = None
+        self._cache: Dict[str, Any] = {}
         
         self._weights = None
         if weights is None:
@@ -356,6 +409,43 @@ class ProteinSequences(UserList):
                 raise ValueError("Length of weights must match the number of sequences")
             self.weights = weights
 
+    # any change to the contained sequences invalidates the cached matrix and properties
+    __setitem__ = _invalidates_cache(UserList.__setitem__)
+    __delitem__ = _invalidates_cache(UserList.__delitem__)
+    __iadd__ = _invalidates_cache(UserList.__iadd__)
+    __imul__ = _invalidates_cache(UserList.__imul__)
+    append = _invalidates_cache(UserList.append)
+    insert = _invalidates_cache(UserList.insert)
+    extend = _invalidates_cache(UserList.extend)
+    pop = _invalidates_cache(UserList.pop)
+    remove = _invalidates_cache(UserList.remove)
+    clear = _invalidates_cache(UserList.clear)
+    sort = _invalidates_cache(UserList.sort)
+    reverse = _invalidates_cache(UserList.reverse)
+
+    def _build_matrix(self) -> Optional[np.ndarray]:
+        """
+        Pack the sequences into a contiguous (N, L) uint8 matrix of their bytes.
+
+        Returns:
+            Optional[np.ndarray]: The matrix, or None if there are no sequences or their lengths differ.
+        """
+        rows = [str(seq).encode('ascii') for seq in self]
+        if not rows or len(set(len(row) for row in rows)) != 1:
+            return None
+        return np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(len(rows), -1)
+
+    def _byte_matrix(self) -> Optional[np.ndarray]:
+        """
+        Get the packed uint8 matrix of the sequences, built once and cached until the sequences change.
+
+        Returns:
+            Optional[np.ndarray]: The matrix, or None if there are no sequences or their lengths differ.
+        """
+        if 'matrix' not in self._cache:
+            self._cache['matrix'] = self._build_matrix()
+        return self._cache['matrix']
+
     @property
     def weights(self) -> np.ndarray:
         """Get the weights for each sequence."""
@@ -378,7 +468,9 @@ class ProteinSequences(UserList):
         Returns:
             bool: True if all sequences have the same length, False otherwise.
         """
-        return len(set(len(seq) for seq in self)) == 1 and (len(self) > 1 or self.has_gaps)
+        if 'aligned' not in self._cache:
+            self._cache['aligned'] = len(set(len(seq) for seq in self)) == 1 and (len(self) > 1 or self.has_gaps)
+        return self._cache['aligned']
 
     @property
     def fixed_length(self) -> bool:
@@ -388,7 +480,14 @@ class ProteinSequences(UserList):
         Returns:
             bool: True if all sequences have the same base length, False otherwise.
         """
-        return len(set(seq.base_length for seq in self)) == 1
+        if 'fixed_length' not in self._cache:
+            matrix = self._byte_matrix()
+            if matrix is not None:
+                base_lengths = matrix.shape[1] - _GAP_LUT[matrix].sum(axis=1)
+            else:
+                base_lengths = [seq.base_length for seq in self]
+            self._cache['fixed_length'] = len(set(base_lengths)) == 1
+        return self._cache['fixed_length']
 
     @property
     def width(self) -> Optional[int]:
@@ -408,7 +507,10 @@ class ProteinSequences(UserList):
         Returns:
             bool: True if any sequence has gaps, False otherwise.
         """
-        return any(seq.has_gaps for seq in self)
+        if 'has_gaps' not in self._cache:
+            # stops at the first gapped sequence, each check is a C level substring search
+            self._cache['has_gaps'] = any(seq.has_gaps for seq in self)
+        return self._cache['has_gaps']
 
     @property
     def mutated_positions(self) -> Optional[List[int]]:
@@ -425,13 +527,11 @@ class ProteinSequences(UserList):
         if not self:  # If the list is empty
             return []
 
-        mutated = []
-        seq_length = len(self[0])
-        for i in range(seq_length):
-            chars = set(seq.get_protein_character(i) for seq in self)
-            if len(chars) > 1:
-                mutated.append(i)
-        return mutated
+        if 'mutated_positions' not in self._cache:
+            # a column is mutated if its min and max byte differ
+            matrix = self._byte_matrix()
+            self._cache['mutated_positions'] = np.flatnonzero(matrix.max(axis=0) != matrix.min(axis=0)).tolist()
+        return list(self._cache['mutated_positions'])
     
     def __getitem__(self, index: Union[int, slice, str]) -> Union[ProteinSequence, 'ProteinSequences']:
         """
@@ -465,9 +565,9 @@ class ProteinSequences(UserList):
         Args:
             output_path (str): The path to the output FASTA file.
         """
-
-        with open(output_path, 'w') as f:
-            write_fasta(((seq.id or hash(seq), str(seq)) for seq in self), f)
+        # fallback ids stay content hashes rather than positional names: align_to and the alignment
+        # mappings look id-less sequences up by str(hash(seq)), and CPython caches the string hash
+        write_fasta_bytes(((seq.id or hash(seq), seq) for seq in self), output_path)
 
     @classmethod
     def from_fasta(cls, input_path: str) -> 'ProteinSequences':
@@ -525,9 +625,9 @@ class ProteinSequences(UserList):
     
     def has_lower(self) -> bool:
         """Check if any sequence contains lowercase characters."""
-        if self.aligned:
-            array = self.as_array()
-            return np.any(np.char.islower(array))
+        matrix = self._byte_matrix()
+        if matrix is not None:
+            return bool(np.any((matrix >= ord('a')) & (matrix <= ord('z'))))
         else:
             return any(c.upper() != c for seq in self for c in seq)
 
@@ -540,22 +640,36 @@ class ProteinSequences(UserList):
         """
         return f"ProteinSequences(count={len(self)}, aligned={self.aligned}, fixed_length={self.fixed_length})"
     
-    def to_on_file(self, output_path: str) -> None:
+    def to_on_file(self, output_path: str) -> 'ProteinSequencesOnFile':
         """
         Write sequences to a FASTA file.
 
         Args:
             output_path (str): The path to the output FASTA file.
+
+        Returns:
+            ProteinSequencesOnFile: The sequences backed by the written file.
         """
-        with open(output_path, 'w') as f:
-            write_fasta(((seq.id or hash(seq), str(seq)) for seq in self), f)
+        self.to_fasta(output_path)
         return ProteinSequencesOnFile(output_path)
+
+    def to_matrix(self) -> 'ProteinSequencesMatrix':
+        """
+        Pack the sequences into a ProteinSequencesMatrix.
+
+        Returns:
+            ProteinSequencesMatrix: The sequences stored as a matrix of residue codes.
+        """
+        return ProteinSequencesMatrix(list(self), weights=self.weights.copy())
     
     def as_array(self) -> np.ndarray:
         """Convert the sequence to a numpy array of characters."""
         if not self.aligned and len(self) > 1:
             raise ValueError("Sequences must be aligned to convert to array.")
-        return np.vstack([seq.as_array for seq in self])
+        matrix = self._byte_matrix()
+        if matrix is None:
+            return np.vstack([seq.as_array for seq in self])
+        return matrix.view('S1').astype('U1')
 
 
     def iter_batches(self, batch_size: int) -> Iterable['ProteinSequences']:
@@ -631,12 +745,13 @@ class ProteinSequences(UserList):
         return [seq.id for seq in self]
 
 
-    def align_all(self, output_fasta: Optional[str] = None) -> Union['ProteinSequences', 'ProteinSequencesOnFile']:
+    def align_all(self, output_fasta: Optional[str] = None, n_jobs: int = 1) -> Union['ProteinSequences', 'ProteinSequencesOnFile']:
         """
         Align the sequences within this ProteinSequences object using MAFFT.
 
         Args:
             output_fasta (Optional[str]): Path to save the alignment. If None, a temporary file is used.
+            n_jobs (int): Number of threads for MAFFT to use. -1 uses all available cores.
 
         Returns:
             Union[ProteinSequences, ProteinSequencesOnFile]: The aligned sequences, either in memory or on file 
@@ -650,11 +765,11 @@ class ProteinSequences(UserList):
         if self.has_gaps:
             raise ValueError("Sequences already contain gaps. Cannot perform alignment on gapped sequences.")
 
-        return mafft_align(self, output_fasta=output_fasta)
+        return mafft_align(self, output_fasta=output_fasta, threads=n_jobs)
     
     def align_to(self, existing_alignment: Union['ProteinSequences', 'ProteinSequencesOnFile'], 
                  realign: bool = False, return_only_new: bool = False,
-                 output_fasta: Optional[str] = None) -> Union['ProteinSequences', 'ProteinSequencesOnFile']:
+                 output_fasta: Optional[str] = None, n_jobs: int = 1) -> Union['ProteinSequences', 'ProteinSequencesOnFile']:
         """
         Align this ProteinSequences object to an existing alignment using MAFFT.
 
@@ -663,6 +778,7 @@ class ProteinSequences(UserList):
             realign (bool): If True, realign all sequences from scratch. If False, add new sequences to existing alignment.\
             return_only_new (bool): If True, return only the newly aligned sequences. If False, return all sequences.
             output_fasta (Optional[str]): Path to save the alignment. If None, a temporary file is used.
+            n_jobs (int): Number of threads for MAFFT to use. -1 uses all available cores.
 
         Returns:
             Union[ProteinSequences, ProteinSequencesOnFile]: The aligned sequences, either in memory or on file 
@@ -679,7 +795,7 @@ class ProteinSequences(UserList):
         if not existing_alignment.aligned:
             raise ValueError("Existing alignment must be aligned.")
 
-        all_aligned = mafft_align(self, existing_alignment=existing_alignment, realign=realign, output_fasta=output_fasta)
+        all_aligned = mafft_align(self, existing_alignment=existing_alignment, realign=realign, output_fasta=output_fasta, threads=n_jobs)
 
         if return_only_new:
             id_mapping = all_aligned.get_id_mapping()
@@ -709,18 +825,12 @@ class ProteinSequences(UserList):
         if not self.aligned:
             raise ValueError("Sequences must be aligned to create an alignment mapping.")
 
+        # gap flags for every residue come from the packed byte matrix instead of a ProteinCharacter per residue
+        not_gap = ~_GAP_LUT[self._byte_matrix()]
         mapping = {}
-        for seq in self:
+        for seq, seq_not_gap in zip(self, not_gap):
             seq_id = seq.id if seq.id else str(hash(seq))
-            seq_mapping = []
-            original_pos = 0
-            for aligned_pos, char in enumerate(seq.iter_protein_characters()):
-                if not char.is_gap:
-                    seq_mapping.append(aligned_pos)
-                    original_pos += 1
-                else:
-                    pass
-            mapping[seq_id] = seq_mapping
+            mapping[seq_id] = np.flatnonzero(seq_not_gap).tolist()
 
         return mapping
 
@@ -740,6 +850,9 @@ class ProteinSequences(UserList):
         if self.has_gaps:
             raise ValueError("Sequences already contain gaps. Cannot apply alignment mapping to gapped sequences.")
 
+        # the alignment width is the same for every sequence, compute it once
+        width = max((max(seq_mapping) for seq_mapping in mapping.values() if len(seq_mapping)), default=-1) + 1
+
         aligned_sequences = []
         for seq in self:
             seq_id = seq.id if seq.id else str(hash(seq))
@@ -747,13 +860,13 @@ class ProteinSequences(UserList):
                 raise ValueError(f"Sequence ID or hash '{seq_id}' not found in the alignment mapping.")
 
             seq_mapping = mapping[seq_id]
-            aligned_seq = ['-'] * (max(filter(None, seq_mapping)) + 1)
-            for original_pos, aligned_pos in enumerate(seq_mapping):
-                if original_pos >= len(seq):
-                    raise ValueError(f"Invalid mapping for sequence '{seq_id}': original position {original_pos} out of range.")
-                aligned_seq[aligned_pos] = seq[original_pos]
+            if len(seq_mapping) > len(seq):
+                raise ValueError(f"Invalid mapping for sequence '{seq_id}': original position {len(seq)} out of range.")
 
-            aligned_sequences.append(ProteinSequence(''.join(aligned_seq), id=seq.id, structure=seq.structure))
+            aligned_seq = np.full(width, ord('-'), dtype=np.uint8)
+            aligned_seq[np.asarray(seq_mapping, dtype=np.int64)] = np.frombuffer(
+                str(seq).encode('ascii'), dtype=np.uint8)[:len(seq_mapping)]
+            aligned_sequences.append(ProteinSequence(aligned_seq.tobytes().decode('ascii'), id=seq.id, structure=seq.structure))
 
         return ProteinSequences(aligned_sequences)
 
@@ -782,19 +895,30 @@ class ProteinSequencesOnFile(ProteinSequences):
         to_fasta: Write sequences to a FASTA file.
         from_fasta: Create a ProteinSequences object from a FASTA file.
     """
+    _mutated_positions_batch_size: int = 1024
+    _index_cache_suffix: str = '.aideidx'
+    _index_cache_version: int = 2
+    _index_fields: frozenset = frozenset(('start', 'span', 'length', 'has_gaps', 'base_length'))
 
-    def __init__(self, file_path: str, weights: Optional[np.ndarray] = None):
+    def __init__(self, file_path: str, weights: Optional[np.ndarray] = None, index_cache: bool = False):
         """
         Initialize a ProteinSequencesOnFile object.
 
         Args:
             file_path (str): Path to the FASTA file containing protein sequences.
             weights (Optional[np.ndarray]): Weights for each sequence. If None, initialized as ones.
+            index_cache (bool): If True, store the index in a sidecar file next to the FASTA file
+                and reuse it on later loads as long as the FASTA file is unchanged.
         """
         self.file_path: str = file_path
         self._index: Dict[str, Dict[str, Any]] = {}
-        self._create_index()
+        self._ids: List[str] = []
+        if not (index_cache and self._load_index_cache()):
+            self._create_index()
+            if index_cache:
+                self._write_index_cache()
         self._compute_global_properties()
+        self._open()
         super().__init__([])  # Initialize with an empty list
         
         if weights is None:
@@ -808,45 +932,150 @@ class ProteinSequencesOnFile(ProteinSequences):
         """
         Create an index of sequences in the FASTA file for efficient access.
 
-        This method reads through the FASTA file once, creating an index with
-        information about each sequence's position, length, and other properties.
-        """
-        with open(self.file_path, 'r') as f:
-            current_id: Optional[str] = None
-            seq_start: Optional[int] = None
-            seq_length: int = 0
-            has_gaps: bool = False
-            base_length: int = 0
-            file_pos: int = 0
-
-            for line in f:
-                if line.startswith('>'):
-                    if current_id is not None:
-                        self._index[current_id] = {
-                            'start': seq_start,
-                            'length': seq_length,
-                            'has_gaps': has_gaps,
-                            'base_length': base_length
-                        }
-                    current_id = line[1:].strip().split()[0]
-                    seq_start = file_pos + len(line)
-                    seq_length = 0
-                    has_gaps = False
-                    base_length = 0
+        This method scans a read only memory map of the FASTA file once, locating records
+        with byte searches and creating an index with information about each sequence's
+        position, length, and other properties.
+        """
+        with open(self.file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                if mm[:1] == b'>':
+                    record_start = 0
                 else:
-                    seq = line.strip()
-                    seq_length += len(seq)
-                    has_gaps = has_gaps or ('-' in seq)
-                    base_length += len(seq.replace('-', ''))
-                file_pos += len(line)
-
-            if current_id is not None:
-                self._index[current_id] = {
-                    'start': seq_start,
-                    'length': seq_length,
-                    'has_gaps': has_gaps,
-                    'base_length': base_length
-                }
+                    record_start = mm.find(b'\n>')
+                    if record_start == -1:
+                        return
+                    record_start += 1
+
+                while record_start != -1:
+                    header_end = mm.find(b'\n', record_start)
+                    if header_end == -1:
+                        header_end = size
+                    next_record = mm.find(b'\n>', header_end)
+                    seq_end = size if next_record == -1 else next_record
+
+                    current_id = mm[record_start + 1:header_end].decode().strip().split()[0]
+                    if current_id not in self._index:
+                        self._ids.append(current_id)
+                    seq_start = header_end + 1
+                    residues = mm[seq_start:seq_end].translate(None, _FASTA_WHITESPACE)
+                    base_length = len(residues.translate(None, _GAP_BYTES))
+                    self._index[current_id] = {
+                        'start': seq_start,
+                        'span': max(seq_end - seq_start, 0),
+                        'length': len(residues),
+                        'has_gaps': base_length < len(residues),
+                        'base_length': base_length
+                    }
+
+                    record_start = next_record if next_record == -1 else next_record + 1
+
+    @property
+    def _index_cache_path(self) -> str:
+        """Path of the sidecar file holding the cached index."""
+        return self.file_path + self._index_cache_suffix
+
+    def _file_fingerprint(self) -> Dict[str, Any]:
+        """
+        Identify the current state of the FASTA file.
+
+        Modification time and size catch most changes, and a BLAKE2b digest of the first
+        and last 4 KB catches in place edits that keep both.
+
+        Returns:
+            Dict[str, Any]: The fingerprint of the file.
+        """
+        stat = os.stat(self.file_path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.file_path, 'rb') as f:
+            digest.update(f.read(4096))
+            if stat.st_size > 4096:
+                f.seek(max(stat.st_size - 4096, 4096))
+                digest.update(f.read(4096))
+        return {
+            'version': self._index_cache_version,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest.hexdigest(),
+        }
+
+    def _load_index_cache(self) -> bool:
+        """
+        Load the index from the sidecar file if it matches the current FASTA file.
+
+        The sidecar is plain JSON, so loading it never runs code, and any unreadable, malformed or
+        stale sidecar is treated as a cache miss.
+
+        Returns:
+            bool: True if the index was loaded, False if there is no valid cache.
+        """
+        try:
+            with open(self._index_cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached['fingerprint'] != self._file_fingerprint():
+                return False
+            index, ids = cached['index'], cached['ids']
+            valid = (isinstance(index, dict) and isinstance(ids, list)
+                     and len(ids) == len(index) and all(id in index for id in ids)
+                     and all(isinstance(info, dict) and info.keys() == self._index_fields for info in index.values()))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        if not valid:
+            return False
+        self._index = index
+        self._ids = ids
+        return True
+
+    def _write_index_cache(self) -> None:
+        """
+        Write the index to the sidecar file.
+
+        The file is written to a temporary path and renamed into place so readers never see a partial
+        cache. Failures, eg. a read only directory, are ignored since the cache is only an optimization.
+        """
+        payload = {'fingerprint': self._file_fingerprint(), 'index': self._index, 'ids': self._ids}
+        directory = os.path.dirname(os.path.abspath(self._index_cache_path))
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f)
+            os.replace(temp_path, self._index_cache_path)
+        except OSError:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _open(self) -> None:
+        """
+        Open a read only descriptor of the FASTA file that is reused for every sequence access.
+
+        Records are read with positional reads rather than through a memory map, so a file that is
+        truncated while open gives a short read instead of a bus error.
+        """
+        self._fd = os.open(self.file_path, os.O_RDONLY)
+
+    def close(self) -> None:
+        """Close the file descriptor held for sequence access."""
+        if getattr(self, '_fd', None) is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self):
+        """Release the file descriptor when the object is garbage collected."""
+        self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Drop the file descriptor when pickling, it is reopened on unpickling."""
+        state = self.__dict__.copy()
+        state['_fd'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore state and reopen the FASTA file."""
+        self.__dict__.update(state)
+        self._open()
 
     def _compute_global_properties(self) -> None:
         """
@@ -885,11 +1114,12 @@ class ProteinSequencesOnFile(ProteinSequences):
         Raises:
             IndexError: If the index is out of range.
             KeyError: If the ID is not found.
+            ValueError: If the file was truncated after it was indexed.
         """
         if isinstance(index, int):
             if index < 0 or index >= len(self):
                 raise IndexError("Index out of range")
-            id = list(self._index.keys())[index]
+            id = self._ids[index]
         else:
             id = index
 
@@ -897,16 +1127,12 @@ class ProteinSequencesOnFile(ProteinSequences):
             raise KeyError(f"Sequence ID '{id}' not found")
 
         info = self._index[id]
-        with open(self.file_path, 'r') as f:
-            f.seek(info['start'])
-            sequence = []
-            remaining_length = info['length']
-            while remaining_length > 0:
-                line = f.readline().strip()
-                sequence.append(line)
-                remaining_length -= len(line)
-
-        sequence = ''.join(sequence)
+        if info['span'] == 0:
+            return ProteinSequence('', id=id)
+        raw = os.pread(self._fd, info['span'], info['start'])
+        if len(raw) < info['span']:
+            raise ValueError(f"FASTA file {self.file_path} is shorter than when it was indexed, reload it with a new ProteinSequencesOnFile.")
+        sequence = raw.translate(None, _FASTA_WHITESPACE).decode('ascii')
         return ProteinSequence(sequence, id=id)
 
     def __iter__(self) -> Iterable[ProteinSequence]:
@@ -916,9 +1142,8 @@ class ProteinSequencesOnFile(ProteinSequences):
         Yields:
             ProteinSequence: Each protein sequence in the file.
         """
-        with open(self.file_path, 'r') as f:
-            for id, seq in read_fasta(f):
-                yield ProteinSequence(seq, id=id)
+        for id in self._ids:
+            yield self[id]
 
     @property
     def aligned(self) -> bool:
@@ -970,16 +1195,36 @@ class ProteinSequencesOnFile(ProteinSequences):
         """
         if not self.aligned:
             return None
-        positions: List[set] = [set() for _ in range(self.width)]
+        # stream rows into a fixed size buffer and keep running column extrema so memory stays bounded
+        buffer = np.empty((min(len(self), self._mutated_positions_batch_size), self.width), dtype=np.uint8)
+        col_min = np.full(self.width, 255, dtype=np.uint8)
+        col_max = np.zeros(self.width, dtype=np.uint8)
+        n_rows = 0
         for seq in self:
-            for i, char in enumerate(str(seq)):
-                positions[i].add(char)
-        return [i for i, chars in enumerate(positions) if len(chars) > 1]
+            buffer[n_rows] = np.frombuffer(str(seq).encode('ascii'), dtype=np.uint8)
+            n_rows += 1
+            if n_rows == len(buffer):
+                np.minimum(col_min, buffer.min(axis=0), out=col_min)
+                np.maximum(col_max, buffer.max(axis=0), out=col_max)
+                n_rows = 0
+        if n_rows:
+            np.minimum(col_min, buffer[:n_rows].min(axis=0), out=col_min)
+            np.maximum(col_max, buffer[:n_rows].max(axis=0), out=col_max)
+        return np.flatnonzero(col_max != col_min).tolist()
     
+    def _byte_matrix(self) -> Optional[np.ndarray]:
+        """
+        Get the packed uint8 matrix of the sequences. Not cached, to avoid holding the whole file in memory.
+
+        Returns:
+            Optional[np.ndarray]: The matrix, or None if there are no sequences or their lengths differ.
+        """
+        return self._build_matrix()
+
     @property
     def ids(self) -> List[str]:
         """Get a list of sequence IDs."""
-        return list(self._index.keys())
+        return list(self._ids)
 
     def to_dict(self) -> Dict[str, str]:
         """
@@ -997,8 +1242,24 @@ class ProteinSequencesOnFile(ProteinSequences):
         Args:
             output_path (str): The path to the output FASTA file.
         """
-        with open(output_path, 'w') as f:
-            write_fasta(((id, str(self[id])) for id in self._index), f)
+        records = ((id, self[id]) for id in self._ids)
+        if not (os.path.exists(output_path) and os.path.samefile(output_path, self.file_path)):
+            write_fasta_bytes(records, output_path)
+            return
+        # rewriting the indexed file in place would truncate it under the open descriptor, so write
+        # alongside it, swap the new file in, and index the rewritten layout
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix='.tmp')
+        os.close(fd)
+        try:
+            write_fasta_bytes(records, temp_path)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.close()
+        self._index, self._ids = {}, []
+        self._create_index()
+        self._open()
 
     @classmethod
     def from_fasta(cls, input_path: str) -> 'ProteinSequencesOnFile':
@@ -1046,7 +1307,401 @@ class ProteinSequencesOnFile(ProteinSequences):
             ProteinSequences: A batch of sequences.
         """
         for i in range(0, len(self), batch_size):
-            yield ProteinSequences([self[id] for id in list(self._index.keys())[i:i+batch_size]])
+            yield ProteinSequences([self[id] for id in self._ids[i:i+batch_size]])
     
 
     
+
+
+############################################
+# A class with the same API as ProteinSequences but stored as a matrix of residue codes
+############################################
+
+class ProteinSequencesMatrix(ProteinSequences):
+    """
+    A compact, read only representation of protein sequences as a matrix of residue codes.
+
+    Each residue is stored as a single uint8 code in one contiguous (N, L) array, padded to the
+    longest sequence, next to the ids, structures and lengths of the sequences. ProteinSequence
+    objects are only decoded on access. Global properties are computed with vectorized operations
+    over the codes.
+
+    This class maintains the same API as ProteinSequences for reading. Use to_memory to get a
+    mutable ProteinSequences.
+
+    Attributes:
+        codes (np.ndarray): (N, L) uint8 residue codes, padded past each sequence length.
+        lengths (np.ndarray): Length of each sequence.
+        aligned (bool): True if all sequences have the same length, False otherwise.
+        fixed_length (bool): True if all sequences have the same base length, False otherwise.
+        width (Optional[int]): The length of the sequences if aligned, None otherwise.
+        has_gaps (bool): True if any sequence has gaps, False otherwise.
+        mutated_positions (Optional[List[int]]): List of mutated positions if aligned, None otherwise.
+
+    Methods:
+        from_fasta: Create a ProteinSequencesMatrix object from a FASTA file.
+        to_memory: Convert to a ProteinSequences object.
+    """
+
+    def __init__(self, sequences: List[ProteinSequence], weights: Optional[np.ndarray] = None):
+        """
+        Initialize a ProteinSequencesMatrix object.
+
+        Args:
+            sequences (List[ProteinSequence]): A list of ProteinSequence objects.
+            weights (Optional[np.ndarray]): Weights for each sequence. If None, initialized as ones.
+        """
+        # the input is read several times below, so materialize iterables such as generators once
+        sequences = list(sequences)
+        for s in sequences:
+            if not isinstance(s, ProteinSequence):
+                raise ValueError("All elements must be ProteinSequence objects")
+        lengths = np.array([len(seq) for seq in sequences], dtype=np.int32)
+        codes = np.zeros((len(sequences), int(lengths.max(initial=0))), dtype=np.uint8)
+        for i, seq in enumerate(sequences):
+            codes[i, :lengths[i]] = self._encode(seq)
+        self._set_arrays(codes, lengths, [seq.id for seq in sequences], [seq.structure for seq in sequences])
+        super().__init__([], weights=weights)
+
+    def _set_arrays(self, codes: np.ndarray, lengths: np.ndarray, ids: List[Optional[str]], structures: List[Optional["ProteinStructure"]]) -> None:
+        """Set the underlying storage."""
+        self._codes = codes
+        self._lengths = lengths
+        self._ids = ids
+        self._structures = structures
+
+    @classmethod
+    def _from_arrays(cls, codes: np.ndarray, lengths: np.ndarray, ids: List[Optional[str]],
+                     structures: List[Optional["ProteinStructure"]], weights: Optional[np.ndarray] = None) -> 'ProteinSequencesMatrix':
+        """Create a ProteinSequencesMatrix directly from its storage arrays."""
+        obj = cls.__new__(cls)
+        obj._set_arrays(codes, lengths, ids, structures)
+        ProteinSequences.__init__(obj, [], weights=weights)
+        return obj
+
+    @staticmethod
+    def _encode(seq: str) -> np.ndarray:
+        """Convert an already validated sequence to residue codes."""
+        return _AA_TO_CODE[np.frombuffer(str(seq).encode('ascii'), dtype=np.uint8)]
+
+    def _read_only(self, *args, **kwargs):
+        """Reject any in place modification of the matrix."""
+        raise TypeError("ProteinSequencesMatrix is read only, use to_memory() to get a mutable ProteinSequences.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = insert = extend = pop = remove = clear = sort = reverse = _read_only
+
+    @classmethod
+    def _coerce(cls, other: Iterable[ProteinSequence]) -> 'ProteinSequencesMatrix':
+        """Get other as a ProteinSequencesMatrix, encoding it if needed."""
+        return other if isinstance(other, ProteinSequencesMatrix) else cls(list(other))
+
+    @classmethod
+    def _concat(cls, first: 'ProteinSequencesMatrix', second: 'ProteinSequencesMatrix') -> 'ProteinSequencesMatrix':
+        """Stack the storage of two matrices, padding both to the wider one."""
+        width = max(first._codes.shape[1], second._codes.shape[1])
+        codes = np.zeros((len(first) + len(second), width), dtype=np.uint8)
+        codes[:len(first), :first._codes.shape[1]] = first._codes
+        codes[len(first):, :second._codes.shape[1]] = second._codes
+        return cls._from_arrays(codes, np.concatenate([first._lengths, second._lengths]),
+                                first._ids + second._ids, first._structures + second._structures)
+
+    def _matching_positions(self, item: object) -> np.ndarray:
+        """
+        Find the positions of the sequences equal to item.
+
+        Residue codes are compared before ids and structures, so no sequence is decoded.
+
+        Args:
+            item (object): The value to look for.
+
+        Returns:
+            np.ndarray: The matching positions in ascending order.
+        """
+        if not isinstance(item, ProteinSequence):
+            return np.array([], dtype=np.intp)
+        candidates = np.flatnonzero(self._lengths == len(item))
+        if len(candidates) and len(item):
+            candidates = candidates[(self._codes[candidates, :len(item)] == self._encode(item)).all(axis=1)]
+        # same metadata comparison as ProteinSequence.__eq__
+        return np.array([i for i in candidates if self._ids[i] == item.id and hash(self._structures[i]) == hash(item.structure)], dtype=np.intp)
+
+    def __contains__(self, item: object) -> bool:
+        """Check if a sequence equal to item is stored."""
+        return len(self._matching_positions(item)) > 0
+
+    def count(self, item: object) -> int:
+        """Count the sequences equal to item."""
+        return len(self._matching_positions(item))
+
+    def index(self, item: object, *args: int) -> int:
+        """
+        Get the position of the first sequence equal to item.
+
+        Args:
+            item (object): The value to look for.
+            *args (int): Optional start and stop positions, as for list.index.
+
+        Returns:
+            int: The position of the first match.
+
+        Raises:
+            ValueError: If no sequence equal to item is in the given range.
+        """
+        start, stop = (args + (None, None))[:2]
+        bounds = range(len(self))[start:stop]
+        for position in self._matching_positions(item):
+            if bounds.start <= position < bounds.stop:
+                return int(position)
+        raise ValueError(f"{item!r} is not in ProteinSequencesMatrix")
+
+    def copy(self) -> 'ProteinSequencesMatrix':
+        """Return a copy of the matrix and its weights."""
+        return self._from_arrays(self._codes.copy(), self._lengths.copy(), list(self._ids), list(self._structures),
+                                 weights=self.weights.copy())
+
+    def __add__(self, other: Iterable[ProteinSequence]) -> 'ProteinSequencesMatrix':
+        """Concatenate with other sequences."""
+        return self._concat(self, self._coerce(other))
+
+    def __radd__(self, other: Iterable[ProteinSequence]) -> 'ProteinSequencesMatrix':
+        """Concatenate other sequences with this matrix."""
+        return self._concat(self._coerce(other), self)
+
+    def __mul__(self, n: int) -> 'ProteinSequencesMatrix':
+        """Repeat the sequences n times."""
+        if not isinstance(n, int):
+            return NotImplemented
+        return self[np.tile(np.arange(len(self)), max(n, 0))]
+
+    __rmul__ = __mul__
+
+    def _comparable(self, other: object) -> object:
+        """Get other in the form list comparisons expect."""
+        return list(other) if isinstance(other, UserList) else other
+
+    def __eq__(self, other: object) -> bool:
+        """Check if other holds equal sequences in the same order."""
+        if isinstance(other, ProteinSequencesMatrix):
+            if len(self) != len(other) or not np.array_equal(self._lengths, other._lengths):
+                return False
+            width = int(self._lengths.max(initial=0))
+            in_sequence = np.arange(width) < self._lengths[:, None]
+            return (bool((self._codes[:, :width] == other._codes[:, :width])[in_sequence].all())
+                    and self._ids == other._ids
+                    and [hash(s) for s in self._structures] == [hash(s) for s in other._structures])
+        return list(self) == self._comparable(other)
+
+    def __lt__(self, other: object) -> bool:
+        """Compare the sequences in order, as lists do."""
+        return list(self) < self._comparable(other)
+
+    def __le__(self, other: object) -> bool:
+        """Compare the sequences in order, as lists do."""
+        return list(self) <= self._comparable(other)
+
+    def __gt__(self, other: object) -> bool:
+        """Compare the sequences in order, as lists do."""
+        return list(self) > self._comparable(other)
+
+    def __ge__(self, other: object) -> bool:
+        """Compare the sequences in order, as lists do."""
+        return list(self) >= self._comparable(other)
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Get the (N, L) matrix of residue codes, without copying."""
+        return self._codes
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Get the length of each sequence."""
+        return self._lengths
+
+    def _build_matrix(self) -> Optional[np.ndarray]:
+        """
+        Decode the codes into a (N, L) uint8 matrix of sequence bytes.
+
+        Returns:
+            Optional[np.ndarray]: The matrix, or None if there are no sequences or their lengths differ.
+        """
+        if len(self) == 0 or not (self._lengths == self._lengths[0]).all():
+            return None
+        return _CODE_TO_AA[self._codes]
+
+    def _gap_mask(self) -> np.ndarray:
+        """Boolean (N, L) mask of gap residues, excluding padding."""
+        in_sequence = np.arange(self._codes.shape[1]) < self._lengths[:, None]
+        return _GAP_CODE_LUT[self._codes] & in_sequence
+
+    def __len__(self) -> int:
+        """
+        Return the number of sequences.
+
+        Returns:
+            int: The number of sequences.
+        """
+        return len(self._lengths)
+
+    def __getitem__(self, index: Union[int, slice, str, np.ndarray]) -> Union[ProteinSequence, 'ProteinSequencesMatrix']:
+        """
+        Get a ProteinSequence or a subset of sequences.
+
+        Args:
+            index (Union[int, slice, str, np.ndarray]): Index, slice, ID, or array of indices of the sequence(s).
+
+        Returns:
+            Union[ProteinSequence, ProteinSequencesMatrix]: The requested sequence or a new ProteinSequencesMatrix object.
+
+        Raises:
+            IndexError: If the index is out of range.
+            KeyError: If the ID is not found.
+        """
+        if isinstance(index, str):
+            index = self.id_mapping[index]
+        elif isinstance(index, (slice, list, np.ndarray)):
+            positions = np.arange(len(self))[index]
+            return self._from_arrays(self._codes[positions], self._lengths[positions],
+                                     [self._ids[i] for i in positions], [self._structures[i] for i in positions],
+                                     weights=self.weights[positions])
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Index out of range")
+        sequence = _CODE_TO_AA[self._codes[index, :self._lengths[index]]].tobytes().decode('ascii')
+        return ProteinSequence(sequence, id=self._ids[index], structure=self._structures[index])
+
+    def __iter__(self) -> Iterator[ProteinSequence]:
+        """
+        Iterate over all sequences.
+
+        Yields:
+            ProteinSequence: Each protein sequence.
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+    def iter_batches(self, batch_size: int) -> Iterable['ProteinSequencesMatrix']:
+        """
+        Iterate over batches of sequences.
+
+        Args:
+            batch_size (int): The size of each batch.
+
+        Yields:
+            ProteinSequencesMatrix: A batch of sequences, sliced from the codes without decoding.
+        """
+        for i in range(0, len(self), batch_size):
+            yield self[i:i+batch_size]
+
+    @property
+    def aligned(self) -> bool:
+        """
+        Check if all sequences are of equal length (including gaps).
+
+        Returns:
+            bool: True if all sequences have the same length, False otherwise.
+        """
+        if len(self) == 0 or not (self._lengths == self._lengths[0]).all():
+            return False
+        return len(self) > 1 or self.has_gaps
+
+    @property
+    def fixed_length(self) -> bool:
+        """
+        Check if all contained sequences have the same base length (excluding gaps).
+
+        Returns:
+            bool: True if all sequences have the same base length, False otherwise.
+        """
+        if len(self) == 0:
+            return False
+        base_lengths = self._lengths - self._gap_mask().sum(axis=1)
+        return bool((base_lengths == base_lengths[0]).all())
+
+    @property
+    def width(self) -> Optional[int]:
+        """
+        Get the length of the sequences if aligned.
+
+        Returns:
+            Optional[int]: The length of the sequences if aligned, None otherwise.
+        """
+        return int(self._lengths[0]) if self.aligned else None
+
+    @property
+    def has_gaps(self) -> bool:
+        """
+        Check if any sequences have gaps.
+
+        Returns:
+            bool: True if any sequence has gaps, False otherwise.
+        """
+        return bool(self._gap_mask().any())
+
+    @property
+    def mutated_positions(self) -> Optional[List[int]]:
+        """
+        List columns that have more than one character, assuming sequences are aligned.
+
+        Returns:
+            Optional[List[int]]: List of mutated positions if aligned, None otherwise.
+        """
+        if not self.aligned:
+            warnings.warn("Sequences are not aligned. Cannot determine mutated positions.")
+            return None
+        return np.flatnonzero(self._codes.max(axis=0) != self._codes.min(axis=0)).tolist()
+
+    @property
+    def ids(self) -> List[str]:
+        """Get a list of sequence IDs."""
+        return list(self._ids)
+
+    def get_id_mapping(self) -> Dict[str, int]:
+        """
+        Create a mapping of sequence IDs to indices, only decoding sequences that have no ID.
+
+        Returns:
+            Dict[str, int]: A dictionary where keys are sequence IDs and values are indices.
+        """
+        return {id if id else hash(self[i]): i for i, id in enumerate(self._ids)}
+
+    @classmethod
+    def from_fasta(cls, input_path: str) -> 'ProteinSequencesMatrix':
+        """
+        Create a ProteinSequencesMatrix object from a FASTA file.
+
+        The file is indexed first so that the code matrix can be allocated once and filled
+        while streaming sequences from the memory mapped file.
+
+        Args:
+            input_path (str): The path to the input FASTA file.
+
+        Returns:
+            ProteinSequencesMatrix: A new ProteinSequencesMatrix object.
+        """
+        on_file = ProteinSequencesOnFile(input_path)
+        lengths = np.array([on_file._index[id]['length'] for id in on_file.ids], dtype=np.int32)
+        codes = np.zeros((len(lengths), int(lengths.max(initial=0))), dtype=np.uint8)
+        for i, seq in enumerate(on_file):
+            codes[i, :lengths[i]] = cls._encode(seq)
+        on_file.close()
+        return cls._from_arrays(codes, lengths, on_file.ids, [None] * len(lengths))
+
+    def to_memory(self) -> ProteinSequences:
+        """
+        Decode all sequences into a ProteinSequences object.
+
+        Returns:
+            ProteinSequences: A new ProteinSequences object containing all sequences.
+        """
+        return ProteinSequences(list(self), weights=self.weights.copy())
+
+    def __repr__(self) -> str:
+        """
+        Return a string representation of the ProteinSequencesMatrix object.
+
+        Returns:
+            str: A string representation of the object.
+        """
+        return f"ProteinSequencesMatrix(count={len(self)}, aligned={self.aligned}, fixed_length={self.fixed_length})"
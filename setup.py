@@ -4,6 +4,6 @@ setup(
     name='aide_predict',
     version='1.0',
     packages=['aide_predict'],
-    # add test requirements for the test addition
-    test_requires=['pytest'],
+    # test requirements, install with `pip install -e .[test]`
+    extras_require={'test': ['pytest', 'pytest-cov', 'pytest-xdist']},
 )
\ No newline at end of file
@@ -0,0 +1,68 @@
+# tests/conftest.py
+'''
+* Author: Evan Komp
+* Created: 10/15/2026
+* Company: National Renewable Energy Lab, Bioeneergy Science and Technology
+* License: MIT
+
+Records how long each test takes so slow unit tests are caught early.
+
+Tests marked `parallel_safe` are expected to run in a few milliseconds; any that take longer than
+SLOW_TEST_THRESHOLD are listed in the terminal summary. This is a warning, not a failure, so a busy
+machine cannot turn the suite red. Pass `--durations-json PATH` to also write every test's call
+duration, keyed by node id, to a JSON file that can be diffed between runs.
+'''
+import json
+
+import pytest
+
+# seconds
+SLOW_TEST_THRESHOLD = 0.05
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--durations-json",
+        default=None,
+        help="Write per-test call durations in seconds, keyed by node id, to this JSON file.",
+    )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(_DurationRecorder(config), "aide_predict_durations")
+
+
+class _DurationRecorder:
+    """Collects call-phase durations from test reports.
+
+    Reports are read in pytest_runtest_logreport rather than timed in pytest_runtest_makereport so that
+    durations from pytest-xdist workers are seen by the controller as well.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.durations = {}
+        self.slow = []
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call":
+            return
+        self.durations[report.nodeid] = report.duration
+        if "parallel_safe" in report.keywords and report.duration > SLOW_TEST_THRESHOLD:
+            self.slow.append((report.nodeid, report.duration))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.slow:
+            return
+        terminalreporter.write_sep("=", f"parallel_safe tests slower than {SLOW_TEST_THRESHOLD * 1000:.0f} ms", yellow=True)
+        for nodeid, duration in sorted(self.slow, key=lambda item: item[1], reverse=True):
+            terminalreporter.write_line(f"{duration * 1000:8.1f} ms  {nodeid}")
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        path = self.config.getoption("durations_json")
+        # xdist workers report back to the controller, which writes the combined file
+        if path is None or hasattr(self.config, "workerinput"):
+            return
+        with open(path, "w") as f:
+            json.dump(self.durations, f, indent=2, sort_keys=True)
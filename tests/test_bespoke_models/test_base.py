@@ -7,9 +7,9 @@
 '''
 import pytest
 import os
-import tempfile
 import numpy as np
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 from aide_predict.utils.data_structures import (
     ProteinSequence, ProteinSequences,
@@ -22,119 +22,135 @@ from aide_predict.bespoke_models.base import (
 )
 
 
+# shared across tests, so frozen against in-place edits such as wt normalization
+_EXPECTED_123 = np.array([1, 2, 3])
+_EXPECTED_2D = np.array([[1, 2]])
+_BAD_2D = np.array([[1, 2, 3]])
+for _array in (_EXPECTED_123, _EXPECTED_2D, _BAD_2D):
+    _array.setflags(write=False)
+
+
+@pytest.fixture(scope="module")
+def temp_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("pmw"))
+
+
+@pytest.fixture(scope="session")
+def sample_seqs():
+    return ProteinSequences([ProteinSequence("ACDE"), ProteinSequence("FGHI")])
+
+
+@pytest.fixture(scope="module", params=[
+    (RequiresMSAMixin, 'requires_msa_for_fit', True),
+    (RequiresFixedLengthMixin, 'requires_fixed_length', True),
+    (CanRegressMixin, 'can_regress', True),
+    (RequiresWTDuringInferenceMixin, 'requires_wt_during_inference', True),
+], ids=lambda param: param[0].__name__)
+def mixin_model(request, tmp_path_factory):
+    mixin_class, attribute, expected = request.param
+    TestModel = type('TestModel', (mixin_class, ProteinModelWrapper), {})
+    model = TestModel(metadata_folder=str(tmp_path_factory.mktemp('mixin')))
+    return model, attribute, expected
+
+
+@pytest.fixture
+def patched_wrapper(monkeypatch, tmp_path):
+    model = ProteinModelWrapper(metadata_folder=str(tmp_path))
+    monkeypatch.setattr(model, '_fit', MagicMock())
+    monkeypatch.setattr(model, '_transform', MagicMock(return_value=_EXPECTED_123))
+    monkeypatch.setattr(model, '_validate_input', MagicMock(return_value=MagicMock()))
+    return model
+
+
+@pytest.mark.parallel_safe
 class TestProteinModelWrapper:
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        self.temp_dir = tempfile.mkdtemp()
-        self.model = ProteinModelWrapper(metadata_folder=self.temp_dir)
-        yield
-        import shutil
-        shutil.rmtree(self.temp_dir)
-
-    def test_init(self):
-        assert os.path.exists(self.temp_dir)
-        assert self.model.wt is None
-
-    def test_validate_input(self):
+    @pytest.fixture
+    def model(self, temp_dir):
+        # a fresh wrapper per test so no state is shared between tests or xdist workers
+        return ProteinModelWrapper(metadata_folder=temp_dir)
+
+    def test_init(self, model, temp_dir):
+        assert os.path.exists(temp_dir)
+        assert model.wt is None
+
+    def test_validate_input(self, model):
         input_list = ["ACDE", "FGHI"]
-        result = self.model._validate_input(input_list)
+        result = model._validate_input(input_list)
         assert isinstance(result, ProteinSequences)
 
-    def test_assert_aligned(self):
-        mock_sequences = MagicMock()
-        mock_sequences.aligned = False
-        self.model._requires_msa_for_fit = True
+    def test_validate_input_protein_sequences(self, model, sample_seqs):
+        assert model._validate_input(sample_seqs) is sample_seqs
+
+    def test_assert_aligned(self, model):
+        mock_sequences = SimpleNamespace(aligned=False)
+        model._requires_msa_for_fit = True
         with pytest.raises(ValueError):
-            self.model._assert_aligned(mock_sequences)
+            model._assert_aligned(mock_sequences)
 
-    def test_assert_fixed_length(self):
-        mock_sequences = MagicMock()
-        mock_sequences.fixed_length = False
-        self.model._requires_fixed_length = True
+    def test_assert_fixed_length(self, model):
+        mock_sequences = SimpleNamespace(fixed_length=False)
+        model._requires_fixed_length = True
         with pytest.raises(ValueError):
-            self.model._assert_fixed_length(mock_sequences)
+            model._assert_fixed_length(mock_sequences)
 
-    def test_enforce_aligned(self):
-        mock_sequences = MagicMock()
-        mock_sequences.aligned = False
-        mock_sequences.align_all.return_value = "aligned_sequences"
-        result = self.model._enforce_aligned(mock_sequences)
+    def test_enforce_aligned(self, model):
+        mock_sequences = SimpleNamespace(aligned=False, align_all=lambda: "aligned_sequences")
+        result = model._enforce_aligned(mock_sequences)
         assert result == "aligned_sequences"
 
-    def test_abstract_methods(self):
-        with pytest.raises(NotImplementedError):
-            self.model._fit(None)
+    @pytest.mark.parametrize("method_name", ["_fit", "_transform", "_partial_fit"])
+    def test_abstract_methods(self, model, method_name):
         with pytest.raises(NotImplementedError):
-            self.model._transform(None)
-        with pytest.raises(NotImplementedError):
-            self.model._partial_fit(None)
-
-    @patch('aide_predict.bespoke_models.base.ProteinModelWrapper._fit')
-    @patch('aide_predict.bespoke_models.base.ProteinModelWrapper._validate_input')
-    @patch('aide_predict.bespoke_models.base.ProteinModelWrapper._assert_aligned')
-    def test_fit(self, mock_assert_aligned, mock_validate_input, mock_fit):
-        mock_validate_input.return_value = MagicMock()
-        self.model.fit(["ACDE", "FGHI"])
-        mock_fit.assert_called_once()
-
-    @patch('aide_predict.bespoke_models.base.ProteinModelWrapper._transform')
-    @patch('aide_predict.bespoke_models.base.ProteinModelWrapper._validate_input')
-    def test_transform(self, mock_validate_input, mock_transform):
-        mock_validate_input.return_value = MagicMock()
-        mock_transform.return_value = np.array([1, 2, 3])
-        self.model.fitted_ = True  # Mock fitted state
-        result = self.model.transform(["ACDE", "FGHI"])
-        np.testing.assert_array_equal(result, np.array([1, 2, 3]))
-
-    def test_predict_not_regressor(self):
+            getattr(model, method_name)(None)
+
+    def test_fit(self, patched_wrapper, sample_seqs):
+        patched_wrapper.fit(sample_seqs)
+        patched_wrapper._validate_input.assert_called_once()
+        patched_wrapper._fit.assert_called_once()
+
+    def test_transform(self, patched_wrapper, sample_seqs):
+        patched_wrapper.fitted_ = True  # Mock fitted state
+        result = patched_wrapper.transform(sample_seqs)
+        np.testing.assert_array_equal(result, _EXPECTED_123)
+        patched_wrapper._transform.assert_called_once()
+
+    def test_predict_not_regressor(self, model, sample_seqs):
         with pytest.raises(ValueError):
-            self.model.predict(["ACDE", "FGHI"])
+            model.predict(sample_seqs)
 
-    def test_get_set_params(self):
-        params = self.model.get_params()
+    def test_get_set_params(self, model):
+        params = model.get_params()
         assert 'metadata_folder' in params
         assert 'wt' in params
 
         new_params = {'metadata_folder': '/new/path', 'wt': 'ACDE'}
-        self.model.set_params(**new_params)
-        assert self.model.metadata_folder == '/new/path'
-        assert str(self.model.wt) == 'ACDE'
+        model.set_params(**new_params)
+        assert model.metadata_folder == '/new/path'
+        assert str(model.wt) == 'ACDE'
 
-    def test_get_feature_names_out(self):
-        self.model.fitted_ = True  # Mock fitted state
-        feature_names = self.model.get_feature_names_out()
+    def test_get_feature_names_out(self, model):
+        model.fitted_ = True  # Mock fitted state
+        feature_names = model.get_feature_names_out()
         assert feature_names == ['ProteinModelWrapper']
 
-    @pytest.mark.parametrize("mixin_class,attribute,expected", [
-        (RequiresMSAMixin, 'requires_msa_for_fit', True),
-        (RequiresFixedLengthMixin, 'requires_fixed_length', True),
-        (CanRegressMixin, 'can_regress', True),
-        (RequiresWTDuringInferenceMixin, 'requires_wt_during_inference', True),
-    ])
-    def test_mixins(self, mixin_class, attribute, expected):
-        class TestModel(mixin_class, ProteinModelWrapper):
-            pass
-        tempdir = tempfile.mkdtemp()
-        model = TestModel(metadata_folder=tempdir)
+    def test_mixins(self, mixin_model):
+        model, attribute, expected = mixin_model
         assert getattr(model, attribute) == expected
 
-    def test_position_specific_mixin(self):
+    def test_position_specific_mixin(self, tmp_path, monkeypatch):
         class TestModel(PositionSpecificMixin, ProteinModelWrapper):
             def __init__(self, *args, **kwargs):
                 super().__init__(pool=False, positions=[1,2], *args, **kwargs)
-        tempdir = tempfile.mkdtemp()
-        model = TestModel(metadata_folder=tempdir)
+        model = TestModel(metadata_folder=str(tmp_path))
         assert model.per_position_capable
 
-        with patch.object(ProteinModelWrapper, 'transform') as mock_transform:
-            mock_transform.return_value = np.array([[1, 2]])
-            result = model.transform(["ACDE"])
-            np.testing.assert_array_equal(result, np.array([[1, 2]]))
+        monkeypatch.setattr(ProteinModelWrapper, 'transform', MagicMock(return_value=_EXPECTED_2D))
+        result = model.transform(["ACDE"])
+        np.testing.assert_array_equal(result, _EXPECTED_2D)
 
-        with patch.object(ProteinModelWrapper, 'transform') as mock_transform:
-            mock_transform.return_value = np.array([[1, 2, 3]])
-            with pytest.raises(ValueError):
-                model.transform(["ACDE"])
+        monkeypatch.setattr(ProteinModelWrapper, 'transform', MagicMock(return_value=_BAD_2D))
+        with pytest.raises(ValueError):
+            model.transform(["ACDE"])
 
         model.fitted_ = True  # Mock fitted state
         feature_names = model.get_feature_names_out()
@@ -142,22 +158,22 @@ class TestProteinModelWrapper:
         assert feature_names == ['TestModel_1_dim0', 'TestModel_2_dim0']
 
 
-    def test_wt_with_gaps(self):
+    def test_wt_with_gaps(self, tmp_path):
         with pytest.raises(ValueError, match="Wild type sequence cannot have gaps."):
-            ProteinModelWrapper(wt="AC-DE")
+            ProteinModelWrapper(metadata_folder=str(tmp_path), wt="AC-DE")
 
-    def test_requires_wt_no_wt_provided(self):
+    def test_requires_wt_no_wt_provided(self, tmp_path):
         class TestModel(RequiresWTToFunctionMixin, ProteinModelWrapper):
             pass
         with pytest.raises(ValueError, match="This model requires a wild type sequence to function."):
-            TestModel()
+            TestModel(metadata_folder=str(tmp_path))
 
-    def test_cache_mixin(self):
+    def test_cache_mixin(self, tmp_path):
         class TestModel(CacheMixin, ProteinModelWrapper):
             def _transform(self, X):
                 return np.array([len(seq) for seq in X]).reshape(-1, 1)
 
-        model = TestModel(use_cache=True)
+        model = TestModel(metadata_folder=str(tmp_path), use_cache=True)
         model.fitted_ = True  # Mock fitted state
         
         # First transformation
@@ -171,22 +187,21 @@ class TestProteinModelWrapper:
         # Check that cache was used
         assert model._cache != {}
 
-    def test_can_handle_aligned_sequences(self):
+    def test_can_handle_aligned_sequences(self, tmp_path):
         class TestModel(CanHandleAlignedSequencesMixin, ProteinModelWrapper):
             def _transform(self, X):
                 return np.array([seq.count('-') for seq in X]).reshape(-1, 1)
 
-        model = TestModel()
+        model = TestModel(metadata_folder=str(tmp_path))
         model.fitted_ = True  # Mock fitted state
         
         result = model.transform(["AC-DE", "FG-H-"])
         np.testing.assert_array_equal(result, np.array([[1], [2]]))
 
-    def test_check_fixed_length(self):
-        model = ProteinModelWrapper()
+    def test_check_fixed_length(self, tmp_path, sample_seqs):
+        model = ProteinModelWrapper(metadata_folder=str(tmp_path))
         
-        fixed_length_sequences = ProteinSequences.from_list(["ACDE", "FGHI"])
-        assert model._check_fixed_length(fixed_length_sequences) == True
+        assert model._check_fixed_length(sample_seqs) == True
         
         variable_length_sequences = ProteinSequences.from_list(["ACDE", "FGH"])
         assert model._check_fixed_length(variable_length_sequences) == False
\ No newline at end of file
@@ -57,6 +57,24 @@ class TestMAFFTAlignment:
         assert aligned_sequences[0].id == "seq1"
         assert str(aligned_sequences[0]) == "ACDEFGHIKLMNPQRSTVWY-"
 
+    def test_mafft_align_threads(self, sample_sequences, mock_mafft_new, monkeypatch):
+        commands = []
+        mock_run = subprocess.run
+        def record_run(*args, **kwargs):
+            commands.append(args[0])
+            return mock_run(*args, **kwargs)
+        monkeypatch.setattr(subprocess, "run", record_run)
+
+        sample_sequences.align_all(n_jobs=4)
+        assert commands[-1].startswith("mafft --thread 4 ")
+
+        mafft_align(sample_sequences)
+        assert "--thread" not in commands[-1]
+
+        for threads in (0, -2):
+            with pytest.raises(ValueError):
+                mafft_align(sample_sequences, threads=threads)
+
     def test_mafft_align_existing(self, sample_sequences, mock_mafft_add):
         existing_alignment = ProteinSequences([
             ProteinSequence("ACDEFGHIKLMNPQRSTVWY-", id="existing1"),
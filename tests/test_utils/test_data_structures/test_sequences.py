@@ -11,9 +11,10 @@ We should be able to handle on file and in memory protein sequences, both aligne
 import pytest
 from tempfile import NamedTemporaryFile
 import os
+import pickle
 import numpy as np
 
-from aide_predict.utils.data_structures import ProteinCharacter, ProteinSequence, ProteinSequences, ProteinSequencesOnFile
+from aide_predict.utils.data_structures import ProteinCharacter, ProteinSequence, ProteinSequences, ProteinSequencesOnFile, ProteinSequencesMatrix
 from aide_predict.utils.constants import AA_SINGLE, GAP_CHARACTERS, NON_CONONICAL_AA_SINGLE
 from Bio.PDB import PDBIO, Structure, Model, Chain, Residue, Atom
 
@@ -168,6 +169,13 @@ END
         assert sample_sequence.id == "sample"
         assert sample_sequence.structure.pdb_file == str(temp_pdb_file)
     
+    def test_invalid_character(self):
+        with pytest.raises(ValueError, match="position 2"):
+            ProteinSequence("AC2E")
+        with pytest.raises(ValueError):
+            ProteinSequence("ACÅE")
+        assert str(ProteinSequence("acde")) == "acde"
+
     def test_structure_setter_invalid_file(self):
         seq = ProteinSequence("ACDE")
         with pytest.raises(FileNotFoundError):
@@ -188,6 +196,7 @@ END
         assert gapped.num_gaps == 1
         assert gapped.base_length == 3
         assert gapped.with_no_gaps() == ProteinSequence("ACD")
+        assert str(ProteinSequence("a.C-D", id="dots").with_no_gaps()) == "aCD"
 
 
     def test_mutation(self, sample_sequence):
@@ -248,6 +257,20 @@ END
 
     def test_hash(self, sample_sequence):
         assert isinstance(hash(sample_sequence), int)
+        assert hash(sample_sequence) == hash(sample_sequence)
+
+        # the hash must follow changes to the id
+        seq = ProteinSequence("ACDE", id="a")
+        before = hash(seq)
+        seq.id = "b"
+        assert hash(seq) != before
+        assert hash(seq) == hash(ProteinSequence("ACDE", id="b"))
+
+    def test_hash_not_pickled(self):
+        # string hashes are seeded per process, so no hash value may travel inside the pickle
+        seq = ProteinSequence("ACDE", id="a")
+        hash(seq)
+        assert pickle.loads(pickle.dumps(seq)).__dict__.keys() == {'_id', '_structure'}
 
     def test_equality(self, sample_sequence):
         same_sequence = ProteinSequence("ACDEFGHIKLMNPQRSTVWY", id="sample")
@@ -257,6 +280,12 @@ END
         assert sample_sequence != different_sequence
         assert sample_sequence == same_sequence_same_structure
 
+        # equality compares sequence and id directly rather than hashes
+        assert ProteinSequence("ACDE", id="a") == ProteinSequence("ACDE", id="a")
+        assert ProteinSequence("ACDE", id="a") != ProteinSequence("ACDF", id="a")
+        assert ProteinSequence("ACDE") != ProteinSequence("ACDE", id="a")
+        assert ProteinSequence("ACDE") != "ACDE"
+
 # ProteinSequences tests
 class TestProteinSequences:
     @pytest.fixture
@@ -276,6 +305,22 @@ class TestProteinSequences:
     def test_mutated_positions(self, sample_sequences):
         assert sample_sequences.mutated_positions == [3]
 
+    def test_cache_invalidated_on_mutation(self):
+        sequences = ProteinSequences([ProteinSequence("ACDE"), ProteinSequence("ACDF")])
+        assert sequences.mutated_positions == [3]
+        assert not sequences.has_gaps
+        sequences.append(ProteinSequence("MC-E"))
+        assert sequences.mutated_positions == [0, 2, 3]
+        assert sequences.has_gaps
+        assert not sequences.fixed_length
+        sequences[2] = ProteinSequence("ACDEF")
+        assert not sequences.aligned
+
+    def test_mutated_positions_wide(self):
+        wt = ProteinSequence("A" * 130)
+        sequences = ProteinSequences([wt, wt.mutate(0, "C"), wt.mutate(64, "C"), wt.mutate(129, "-")])
+        assert sequences.mutated_positions == [0, 64, 129]
+
     def test_to_dict(self, sample_sequences):
         d = sample_sequences.to_dict()
         assert d == {"seq1": "ACDE", "seq2": "ACDF", "seq3": "ACD-"}
@@ -288,6 +333,19 @@ class TestProteinSequences:
         assert content == ">seq1\nACDE\n>seq2\nACDF\n>seq3\nACD-\n"
         os.unlink(temp_file.name)
 
+    def test_to_fasta_wraps_long_sequences(self, tmp_path):
+        output_path = tmp_path / "long.fasta"
+        ProteinSequences([ProteinSequence("A" * 100, id="long")]).to_fasta(str(output_path))
+        assert output_path.read_text() == ">long\n" + "A" * 80 + "\n" + "A" * 20 + "\n"
+        assert str(ProteinSequencesOnFile(str(output_path))[0]) == "A" * 100
+
+    def test_to_fasta_fallback_ids(self, tmp_path):
+        seqs = ProteinSequences([ProteinSequence("ACDE"), ProteinSequence("FGHI", id="named")])
+        output_path = tmp_path / "fallback.fasta"
+        seqs.to_fasta(str(output_path))
+        loaded = ProteinSequences.from_fasta(str(output_path))
+        assert loaded.ids == [str(hash(seqs[0])), "named"]
+
     def test_from_fasta(self):
         fasta_content = ">seq1\nACDE\n>seq2\nACDF\n>seq3\nACD-\n"
         with NamedTemporaryFile(mode='w+', delete=False) as temp_file:
@@ -378,6 +436,15 @@ class TestProteinSequences:
         assert str(aligned[2]) == "AC---D"
         assert aligned[2].id is None  # Ensure the ID (or lack thereof) is preserved
 
+    def test_alignment_mapping_round_trip(self):
+        aligned = ProteinSequences([
+            ProteinSequence("AC-DE-", id="seq1"),
+            ProteinSequence("-CKD-F", id="seq2"),
+        ])
+        mapping = aligned.get_alignment_mapping()
+        restored = aligned.with_no_gaps().apply_alignment_mapping(mapping)
+        assert [str(seq) for seq in restored] == ["AC-DE-", "-CKD-F"]
+
     def test_apply_alignment_mapping_error(self, sample_sequences):
         sample_sequences = sample_sequences.with_no_gaps()
         invalid_mapping = {"nonexistent_id": [0, 1, 2]}
@@ -444,6 +511,12 @@ class TestProteinSequencesOnFile:
         sequences = ProteinSequencesOnFile(sample_fasta_file)
         assert sequences.mutated_positions == [3]
 
+    def test_mutated_positions_batched(self, sample_fasta_file, monkeypatch):
+        # force a partial final batch
+        monkeypatch.setattr(ProteinSequencesOnFile, '_mutated_positions_batch_size', 2)
+        sequences = ProteinSequencesOnFile(sample_fasta_file)
+        assert sequences.mutated_positions == [3]
+
     def test_to_memory(self, sample_fasta_file):
         on_file = ProteinSequencesOnFile(sample_fasta_file)
         in_memory = on_file.to_memory()
@@ -472,6 +545,85 @@ class TestProteinSequencesOnFile:
         assert len(batches[0]) == 2
         assert len(batches[1]) == 1
 
+    def test_pickle_and_close(self, sample_fasta_file):
+        sequences = ProteinSequencesOnFile(sample_fasta_file)
+        restored = pickle.loads(pickle.dumps(sequences))
+        assert str(restored["seq3"]) == "ACD-"
+        assert restored.ids == sequences.ids
+        sequences.close()
+        restored.close()
+
+    def test_truncated_file(self, tmp_path):
+        fasta_path = tmp_path / "truncated.fasta"
+        fasta_path.write_text(">a\nACDEFGHIKL\n>b\nACDEFGHIKL\n")
+        sequences = ProteinSequencesOnFile(str(fasta_path))
+        fasta_path.write_text(">a\nACDE\n")
+        with pytest.raises(ValueError, match="shorter than when it was indexed"):
+            sequences["b"]
+        sequences.close()
+
+    def test_to_fasta_in_place(self, tmp_path):
+        fasta_path = tmp_path / "in_place.fasta"
+        fasta_path.write_text(">a\nACDEF\nGHIKL\n>b\nAC-EF\n")
+        sequences = ProteinSequencesOnFile(str(fasta_path))
+        sequences.to_fasta(str(fasta_path))
+        assert fasta_path.read_text() == ">a\nACDEFGHIKL\n>b\nAC-EF\n"
+        assert sequences.to_dict() == {"a": "ACDEFGHIKL", "b": "AC-EF"}
+        sequences.close()
+
+    def test_index_cache(self, tmp_path, monkeypatch):
+        fasta_path = tmp_path / "cached.fasta"
+        fasta_path.write_text(">seq1\nACDE\n>seq2\nAC-F\n")
+        sequences = ProteinSequencesOnFile(str(fasta_path), index_cache=True)
+        assert os.path.exists(str(fasta_path) + ".aideidx")
+
+        # a valid cache skips the scan of the FASTA file
+        def fail():
+            raise AssertionError("index should have been loaded from the cache")
+        monkeypatch.setattr(ProteinSequencesOnFile, '_create_index', lambda self: fail())
+        reloaded = ProteinSequencesOnFile(str(fasta_path), index_cache=True)
+        assert reloaded.ids == sequences.ids
+        assert str(reloaded["seq2"]) == "AC-F"
+        monkeypatch.undo()
+
+        # editing the file invalidates the cache
+        fasta_path.write_text(">seq1\nACDE\n>seq3\nMMMM\n>seq4\nA\n")
+        edited = ProteinSequencesOnFile(str(fasta_path), index_cache=True)
+        assert edited.ids == ["seq1", "seq3", "seq4"]
+        assert str(edited["seq4"]) == "A"
+
+    @pytest.mark.parametrize("sidecar", [
+        b"\x80\x04cos\nnope\n.",
+        b"not json",
+        b"[]",
+        b'{"fingerprint": null}',
+    ])
+    def test_index_cache_garbage_sidecar(self, tmp_path, sidecar):
+        fasta_path = tmp_path / "garbage.fasta"
+        fasta_path.write_text(">seq1\nACDE\n>seq2\nAC-F\n")
+        (tmp_path / "garbage.fasta.aideidx").write_bytes(sidecar)
+        sequences = ProteinSequencesOnFile(str(fasta_path), index_cache=True)
+        assert sequences.ids == ["seq1", "seq2"]
+        assert str(sequences["seq2"]) == "AC-F"
+        # the garbage is replaced by a valid cache
+        assert ProteinSequencesOnFile(str(fasta_path), index_cache=True)._load_index_cache()
+
+    def test_no_trailing_newline(self, tmp_path):
+        fasta_path = tmp_path / "no_newline.fasta"
+        fasta_path.write_text(">seq1 description\nAC-E\nFG\n>seq2\nACDF")
+        sequences = ProteinSequencesOnFile(str(fasta_path))
+        assert sequences.ids == ["seq1", "seq2"]
+        assert str(sequences["seq1"]) == "AC-EFG"
+        assert str(sequences[1]) == "ACDF"
+        assert sequences.has_gaps
+        assert sequences._index["seq1"]["base_length"] == 5
+
+        dotted_path = tmp_path / "dotted.fasta"
+        dotted_path.write_text(">seq1\nAC.E\n")
+        dotted = ProteinSequencesOnFile(str(dotted_path))
+        assert dotted.has_gaps
+        assert dotted._index["seq1"]["base_length"] == 3
+
     def test_multi_line_sequence(self, multi_line_fasta_file):
         sequences = ProteinSequencesOnFile(multi_line_fasta_file)
         assert len(sequences) == 3
@@ -509,6 +661,101 @@ class TestProteinSequencesOnFile:
         assert d["seq2"] == "ACDF"
         assert d["seq3"] == "ACD-"
 
+# ProteinSequencesMatrix tests
+class TestProteinSequencesMatrix:
+    @pytest.fixture
+    def sample_matrix(self):
+        return ProteinSequences([
+            ProteinSequence("ACDE", id="seq1"),
+            ProteinSequence("ACDF", id="seq2"),
+            ProteinSequence("acD-", id="seq3")
+        ]).to_matrix()
+
+    def test_properties(self, sample_matrix):
+        assert len(sample_matrix) == 3
+        assert sample_matrix.aligned
+        assert not sample_matrix.fixed_length
+        assert sample_matrix.width == 4
+        assert sample_matrix.has_gaps
+        assert sample_matrix.has_lower()
+        assert sample_matrix.mutated_positions == [0, 1, 3]
+        assert sample_matrix.codes.shape == (3, 4)
+        assert sample_matrix.codes.dtype == np.uint8
+
+    def test_weights_not_shared(self):
+        sequences = ProteinSequences.from_list(["ACDE", "ACDF"])
+        matrix = sequences.to_matrix()
+        matrix.weights[0] = 5
+        assert list(sequences.weights) == [1.0, 1.0]
+
+    def test_from_generator(self):
+        matrix = ProteinSequencesMatrix(ProteinSequence(s) for s in ["ACDE", "AC"])
+        assert [str(seq) for seq in matrix] == ["ACDE", "AC"]
+
+    def test_getitem(self, sample_matrix):
+        assert str(sample_matrix[0]) == "ACDE"
+        assert str(sample_matrix[-1]) == "acD-"
+        assert sample_matrix["seq2"].id == "seq2"
+        subset = sample_matrix[1:]
+        assert isinstance(subset, ProteinSequencesMatrix)
+        assert subset.ids == ["seq2", "seq3"]
+        with pytest.raises(IndexError):
+            sample_matrix[3]
+
+    def test_as_array(self, sample_matrix):
+        arr = sample_matrix.as_array()
+        assert arr.shape == (3, 4)
+        assert ''.join(arr[2]) == "acD-"
+
+    def test_iter_batches(self, sample_matrix):
+        batches = list(sample_matrix.iter_batches(2))
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert all(isinstance(batch, ProteinSequencesMatrix) for batch in batches)
+        assert [str(seq) for seq in batches[1]] == ["acD-"]
+        assert ProteinSequences(sample_matrix).to_dict() == sample_matrix.to_dict()
+
+    def test_contains_index_count(self, sample_matrix):
+        assert sample_matrix[1] in sample_matrix
+        assert ProteinSequence("ACDF") not in sample_matrix  # same residues, different id
+        assert sample_matrix.index(sample_matrix[2]) == 2
+        assert sample_matrix.count(sample_matrix[0]) == 1
+        with pytest.raises(ValueError):
+            sample_matrix.index(sample_matrix[0], 1)
+
+    def test_concatenate_and_compare(self, sample_matrix):
+        other = ProteinSequences([ProteinSequence("ACDEFG", id="seq4")])
+        combined = sample_matrix + other
+        assert isinstance(combined, ProteinSequencesMatrix)
+        assert combined.ids == ["seq1", "seq2", "seq3", "seq4"]
+        assert str(combined[3]) == "ACDEFG"
+        assert (other + sample_matrix).ids == ["seq4", "seq1", "seq2", "seq3"]
+        assert len(sample_matrix * 2) == 6
+        assert sample_matrix == sample_matrix.copy()
+        assert sample_matrix == sample_matrix.to_memory()
+        assert sample_matrix != ProteinSequences([])
+        assert sample_matrix != sample_matrix[:2]
+
+    def test_read_only(self, sample_matrix):
+        with pytest.raises(TypeError):
+            sample_matrix.append(ProteinSequence("ACDE"))
+
+    def test_unaligned(self):
+        matrix = ProteinSequences.from_list(["ACDEF", "AC"]).to_matrix()
+        assert not matrix.aligned
+        assert not matrix.has_gaps
+        assert matrix.width is None
+        assert [str(seq) for seq in matrix] == ["ACDEF", "AC"]
+
+    def test_from_fasta(self, tmp_path):
+        fasta_path = tmp_path / "matrix.fasta"
+        fasta_path.write_text(">seq1\nACDE\nFG\n>seq2\nAC-F\n")
+        matrix = ProteinSequencesMatrix.from_fasta(str(fasta_path))
+        assert matrix.ids == ["seq1", "seq2"]
+        assert list(matrix.lengths) == [6, 4]
+        in_memory = matrix.to_memory()
+        assert isinstance(in_memory, ProteinSequences)
+        assert in_memory.to_dict() == {"seq1": "ACDEFG", "seq2": "AC-F"}
+
 # Integration tests
 def test_integration():
     # Create a ProteinSequence